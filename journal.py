@@ -0,0 +1,301 @@
+"""Append-only game event journal with streaming aggregates.
+
+Events are JSON lines ({"t": ..., "ev": ..., ...}) appended to
+journal.jsonl; once it grows past max_bytes it is renamed to
+journal.<n>.jsonl and a fresh file is started. Nothing is rewritten.
+Each rotation also saves journal.<n>.stats.json, the aggregates through
+that file, so the game only replays the active file at startup.
+
+Run `python journal.py [folder or files...]` for an offline report; files
+are streamed line by line, never loaded whole.
+"""
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import argparse
+import threading
+
+JOURNAL_NAME = "journal.jsonl"
+JOURNAL_MAX_BYTES = 1024 * 1024
+POWERUPS = ("shuffle", "bomb", "freeze")
+
+
+# =============================
+# Writer
+# =============================
+class JournalWriter:
+    """Buffers events and appends them from a background thread."""
+
+    def __init__(self, folder, max_bytes=JOURNAL_MAX_BYTES, stats=None):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        # Aggregates of everything written so far, checkpointed on rotation
+        self.stats = stats or JournalStats()
+        self.path = os.path.join(folder, JOURNAL_NAME)
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, event):
+        self._queue.put(event)
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self):
+        os.makedirs(self.folder, exist_ok=True)
+        done = False
+        while not done:
+            # Block for one event, then drain whatever queued up behind it
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                done = True
+                batch = [e for e in batch if e is not None]
+            if batch:
+                self._append(batch)
+
+    def _append(self, batch):
+        try:
+            with open(self.path, "a") as f:
+                f.write("".join(json.dumps(e, separators=(",", ":")) + "\n" for e in batch))
+                size = f.tell()
+            for e in batch:
+                self.stats.feed(e)
+            if size >= self.max_bytes:
+                self._rotate()
+        except Exception as e:
+            print("[warn] journal", self.path, e)
+
+    def _rotate(self):
+        # Number after the highest file or checkpoint left, even if older ones
+        # were deleted, and never rename onto an existing rotated file
+        n = max(rotated_index(self.folder), latest_checkpoint(self.folder)[0]) + 1
+        while os.path.exists(os.path.join(self.folder, f"journal.{n}.jsonl")):
+            n += 1
+        # Rename first: a crash before the checkpoint only means a replay
+        os.rename(self.path, os.path.join(self.folder, f"journal.{n}.jsonl"))
+        path = os.path.join(self.folder, f"journal.{n}.stats.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.stats.to_dict(), f)
+        os.replace(path + ".tmp", path)
+
+
+def rotated_files(folder):
+    names = []
+    for fname in os.listdir(folder) if os.path.isdir(folder) else []:
+        parts = fname.split(".")
+        if len(parts) == 3 and parts[0] == "journal" and parts[1].isdigit() and parts[2] == "jsonl":
+            names.append((int(parts[1]), fname))
+    return [os.path.join(folder, fname) for _, fname in sorted(names)]
+
+
+def rotated_index(folder):
+    """Highest n of the journal.<n>.jsonl files, or 0."""
+    files = rotated_files(folder)
+    return int(os.path.basename(files[-1]).split(".")[1]) if files else 0
+
+
+def latest_checkpoint(folder):
+    """(n, path) of the newest journal.<n>.stats.json, or (0, None)."""
+    best = (0, None)
+    for fname in os.listdir(folder) if os.path.isdir(folder) else []:
+        parts = fname.split(".")
+        if len(parts) == 4 and parts[0] == "journal" and parts[1].isdigit() and parts[2:] == ["stats", "json"]:
+            best = max(best, (int(parts[1]), os.path.join(folder, fname)))
+    return best
+
+
+def journal_files(folder):
+    """All journal files of a folder, oldest first."""
+    files = rotated_files(folder)
+    active = os.path.join(folder, JOURNAL_NAME)
+    if os.path.exists(active):
+        files.append(active)
+    return files
+
+
+def read_events(paths):
+    for path in paths:
+        try:
+            with open(path, "r") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        pass  # torn last line after a crash
+        except Exception as e:
+            print("[warn] read_events", path, e)
+
+
+# =============================
+# Streaming aggregates
+# =============================
+class JournalStats:
+    """Running stats updated per event; every query is O(1)."""
+
+    def __init__(self):
+        self.events = 0
+        self.starts = {}     # "mode:level" -> level starts
+        self.wins = {}       # "mode:level" -> [wins, total time, total moves]
+        self.flips = 0
+        self.matches = 0
+        self.mismatches = 0
+        self.pu_uses = dict.fromkeys(POWERUPS, 0)
+        self.pu_wins = dict.fromkeys(POWERUPS, 0)   # uses in levels that were then won
+        self.bomb_cleared = 0
+        self._run_powerups = {}   # kind -> uses in the level being played
+
+    def to_dict(self):
+        return {
+            "events": self.events, "starts": self.starts, "wins": self.wins,
+            "flips": self.flips, "matches": self.matches, "mismatches": self.mismatches,
+            "pu_uses": self.pu_uses, "pu_wins": self.pu_wins,
+            "bomb_cleared": self.bomb_cleared, "run_powerups": self._run_powerups,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.events = data["events"]
+        stats.starts = dict(data["starts"])
+        stats.wins = {k: list(v) for k, v in data["wins"].items()}
+        stats.flips, stats.matches, stats.mismatches = data["flips"], data["matches"], data["mismatches"]
+        stats.pu_uses.update(data["pu_uses"])
+        stats.pu_wins.update(data["pu_wins"])
+        stats.bomb_cleared = data["bomb_cleared"]
+        stats._run_powerups = dict(data["run_powerups"])
+        return stats
+
+    def feed(self, e):
+        self.events += 1
+        ev = e.get("ev")
+        if ev == "level_start":
+            if not e.get("resumed"):
+                key = f"{e.get('mode')}:{e.get('level')}"
+                self.starts[key] = self.starts.get(key, 0) + 1
+                self._run_powerups = {}
+        elif ev == "flip":
+            self.flips += 1
+        elif ev == "match":
+            self.matches += 1
+        elif ev == "mismatch":
+            self.mismatches += 1
+        elif ev == "powerup":
+            kind = e.get("kind")
+            if kind in self.pu_uses:
+                self.pu_uses[kind] += 1
+                self._run_powerups[kind] = self._run_powerups.get(kind, 0) + 1
+            self.bomb_cleared += e.get("cleared", 0)
+        elif ev == "win":
+            key = f"{e.get('mode')}:{e.get('level')}"
+            entry = self.wins.setdefault(key, [0, 0, 0])
+            entry[0] += 1
+            entry[1] += e.get("time", 0)
+            entry[2] += e.get("moves", 0)
+            for kind, uses in self._run_powerups.items():
+                self.pu_wins[kind] += uses
+            self._run_powerups = {}
+
+    def avg_time(self, mode, level):
+        entry = self.wins.get(f"{mode}:{level}")
+        return entry[1] / entry[0] if entry else None
+
+    def avg_moves(self, mode, level):
+        entry = self.wins.get(f"{mode}:{level}")
+        return entry[2] / entry[0] if entry else None
+
+    def win_rate(self, mode, level):
+        key = f"{mode}:{level}"
+        starts = self.starts.get(key, 0)
+        return self.wins.get(key, [0])[0] / starts if starts else None
+
+    def accuracy(self):
+        tries = self.matches + self.mismatches
+        return self.matches / tries if tries else None
+
+    def powerup_effectiveness(self, kind):
+        """Share of uses that happened in a level the player went on to win."""
+        uses = self.pu_uses.get(kind, 0)
+        return self.pu_wins.get(kind, 0) / uses if uses else None
+
+
+class Journal:
+    """Game-facing entry point: log() feeds the aggregates and queues the write."""
+
+    def __init__(self, folder, max_bytes=JOURNAL_MAX_BYTES):
+        # Start from the newest checkpoint; replay only what came after it
+        n, path = latest_checkpoint(folder)
+        self.stats = JournalStats()
+        if path:
+            try:
+                with open(path, "r") as f:
+                    self.stats = JournalStats.from_dict(json.load(f))
+            except Exception as e:
+                print("[warn] journal checkpoint", path, e)
+                n = 0
+        later = [p for p in journal_files(folder)
+                 if os.path.basename(p) == JOURNAL_NAME or int(os.path.basename(p).split(".")[1]) > n]
+        for e in read_events(later):
+            self.stats.feed(e)
+        self.writer = JournalWriter(folder, max_bytes, JournalStats.from_dict(self.stats.to_dict()))
+
+    def log(self, ev, **fields):
+        fields["t"] = round(time.time(), 3)
+        fields["ev"] = ev
+        self.stats.feed(fields)
+        self.writer.write(fields)
+
+    def close(self):
+        self.writer.close()
+
+
+# =============================
+# Offline analysis CLI
+# =============================
+def _pct(x):
+    return "—" if x is None else f"{x*100:.0f}%"
+
+def report(stats, out=sys.stdout):
+    out.write(f"events: {stats.events}\n")
+    out.write(f"flips: {stats.flips}  matches: {stats.matches}  mismatches: {stats.mismatches}"
+              f"  accuracy: {_pct(stats.accuracy())}\n")
+    out.write("\nlevel                 starts  wins  win%  avg time  avg moves\n")
+    for key in sorted(set(stats.starts) | set(stats.wins), key=lambda k: (k.split(":")[0], int(k.split(":")[1]))):
+        mode, level = key.split(":")
+        wins = stats.wins.get(key, [0])[0]
+        t, m = stats.avg_time(mode, level), stats.avg_moves(mode, level)
+        out.write(f"{key:<20} {stats.starts.get(key, 0):>7} {wins:>5} {_pct(stats.win_rate(mode, level)):>5}"
+                  f" {('—' if t is None else f'{t:.1f}s'):>9} {('—' if m is None else f'{m:.1f}'):>10}\n")
+    out.write("\npower-up   uses  won-after  effectiveness\n")
+    for kind in POWERUPS:
+        out.write(f"{kind:<9} {stats.pu_uses[kind]:>5} {stats.pu_wins[kind]:>10} {_pct(stats.powerup_effectiveness(kind)):>14}\n")
+    out.write(f"bomb pairs cleared: {stats.bomb_cleared}\n")
+
+
+def main(argv=None):
+    default = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "journal")
+    parser = argparse.ArgumentParser(description="Summarize Memory Match event journals.")
+    parser.add_argument("paths", nargs="*", default=[default], help="journal folders or .jsonl files")
+    args = parser.parse_args(argv)
+    files = []
+    for p in args.paths:
+        files.extend(journal_files(p) if os.path.isdir(p) else [p])
+    stats = JournalStats()
+    for e in read_events(files):
+        stats.feed(e)
+    report(stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,21 @@ import random
 import sys
 import os
 import json
+import struct
 import time
 import datetime
+import threading
+import atexit
+from collections import OrderedDict
 from math import ceil, sqrt
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # procedural faces need NumPy; the game runs without them
+
+from journal import Journal
 
 # =============================
 # Boot & constants
@@ -45,6 +57,8 @@ AST_FOLDER = os.path.join(ROOT, "assets")
 SCORES_FILE = os.path.join(AST_FOLDER, "high_scores.json")
 PROFILE_FILE = os.path.join(AST_FOLDER, "profile.json")
 DAILY_SCORES_FILE = os.path.join(AST_FOLDER, "daily_scores.json")
+SNAPSHOT_FILE = os.path.join(AST_FOLDER, "snapshot.bin")
+JOURNAL_FOLDER = os.path.join(AST_FOLDER, "journal")
 
 if not os.path.exists(AST_FOLDER):
     os.makedirs(AST_FOLDER, exist_ok=True)
@@ -146,25 +160,315 @@ for k, v in _profile_default.items():
     if k not in _profile:
         _profile[k] = v
 
+# Event journal: append-only history plus running aggregates (journal.py)
+_journal = Journal(JOURNAL_FOLDER)
+
 # =============================
 # Face library (IDs = filenames)
 # =============================
+# Resident budget for decoded faces; sources are downsampled at load so a
+# face never takes more than the largest card it can be drawn on.
+FACE_BUDGET_BYTES = 48 * 1024 * 1024
+
+# Procedural faces top up the library when a level needs more pairs than
+# there are image files. IDs are PROC_PREFIX + index; the look of a face
+# depends only on (PROC_FACE_SEED, index), so decks stay reproducible.
+PROC_PREFIX = "~"
+PROC_FACE_SEED = 2025
+PROC_BATCH_PIXELS = 1 << 18  # ~1 MiB per float32 temporary, a few MiB per batch
+
+def is_procedural(fid):
+    return fid.startswith(PROC_PREFIX)
+
+def _mix64(x):
+    # splitmix64 finalizer, vectorized over uint64 arrays
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+def _hsv_to_rgb(hue, sat, val):
+    i = np.floor(hue * 6).astype(np.int64) % 6
+    f = hue * 6 - np.floor(hue * 6)
+    p, q, t = val * (1 - sat), val * (1 - sat * f), val * (1 - sat * (1 - f))
+    r = np.choose(i, [val, q, p, p, t, val])
+    g = np.choose(i, [t, val, val, q, p, p])
+    b = np.choose(i, [p, p, t, val, val, q])
+    return np.stack([r, g, b], axis=-1) * 255
+
+def _pattern_mask(kind, u, v, r, theta, f, a, ph):
+    # f, a, ph are (k, 1, 1) float32 parameters of faces sharing this pattern
+    if kind == 0:    # stripes
+        return np.sin(f * (u * np.cos(a) + v * np.sin(a)) * np.pi + ph) > 0
+    if kind == 1:    # rings
+        return np.sin(f * r * np.pi + ph) > 0
+    if kind == 2:    # checker
+        return np.sin(f * u * np.pi + ph) * np.sin(f * v * np.pi + ph) > 0
+    if kind == 3:    # dots
+        return np.sin(f * u * np.pi + ph) + np.sin(f * v * np.pi + ph) > 0.9
+    if kind == 4:    # waves
+        return np.sin(f * (u * np.cos(a) + v * np.sin(a)) * np.pi + 1.5 * np.sin(f * v * 2) + ph) > 0
+    return np.sin(f * r * np.pi + 3 * theta + ph) > 0   # spiral
+
+def _glyph_mask(kind, u, v, r, g, pad):
+    # pad > 0 grows the shape into its outline
+    au, av = np.abs(u), np.abs(v)
+    if kind == 0:    # circle
+        return r < g + pad
+    if kind == 1:    # square
+        return np.maximum(au, av) < g * 0.85 + pad
+    if kind == 2:    # diamond
+        return au + av < g * 1.15 + pad * 1.25
+    if kind == 3:    # cross
+        return (np.minimum(au, av) < g * 0.3 + pad) & (np.maximum(au, av) < g + pad)
+    if kind == 4:    # ring
+        return np.abs(r - g * 0.85) < g * 0.22 + pad
+    return (v < g * 0.7 + pad) & (2 * au - v < g * 0.9 + pad * 2)   # triangle
+
+def generate_faces(indices, size, seed=PROC_FACE_SEED, cancel=None):
+    """Render procedural faces (pattern + glyph + color scheme) in vectorized batches.
+
+    Returns None if `cancel` (a threading.Event) is set between batches.
+    """
+    w, h = size
+    idx = np.asarray(indices, dtype=np.uint64)
+    n = len(idx)
+    with np.errstate(over="ignore"):
+        state = _mix64(idx + np.uint64(seed) * np.uint64(0x9E3779B97F4A7C15))
+        draws = []
+        for _ in range(10):
+            state = _mix64(state + np.uint64(0x9E3779B97F4A7C15))
+            draws.append((state >> np.uint64(11)).astype(np.float64) / float(1 << 53))
+    hue, hue_off, sat, pat_u, glyph_u, freq_u, angle_u, phase_u, size_u, val_u = draws
+
+    # Per-face parameters; masks are float32, colors uint8
+    pattern = (pat_u * 6).astype(np.int64)
+    glyph = (glyph_u * 6).astype(np.int64)
+    freq = (3 + freq_u * 9).astype(np.float32)
+    angle = (angle_u * np.pi).astype(np.float32)
+    phase = (phase_u * 2 * np.pi).astype(np.float32)
+    gsize = (0.32 + size_u * 0.26).astype(np.float32)
+    light = _hsv_to_rgb(hue, 0.55 + sat * 0.4, 0.75 + val_u * 0.25).astype(np.uint8)
+    dark = _hsv_to_rgb((hue + 0.33 + hue_off * 0.34) % 1.0, 0.5 + sat * 0.4, 0.22 + val_u * 0.25).astype(np.uint8)
+    ink = _hsv_to_rgb((hue + 0.5) % 1.0, 0.15 + hue_off * 0.2, np.full_like(hue, 0.97)).astype(np.uint8)
+
+    # Pixel grid in card space, x first to match surfarray
+    u = np.linspace(-1.0, 1.0, w, dtype=np.float32)[None, :, None]
+    v = np.linspace(-h / w, h / w, h, dtype=np.float32)[None, None, :]
+    r = np.sqrt(u * u + v * v)
+    theta = np.arctan2(v, u)
+
+    out = []
+    step = max(1, min(n, PROC_BATCH_PIXELS // (w * h)))
+    rgb = np.empty((step, w, h, 3), dtype=np.uint8)
+    mask = np.empty((step, w, h), dtype=bool)
+    for lo in range(0, n, step):
+        if cancel is not None and cancel.is_set():
+            return None
+        m = min(step, n - lo)
+        face, fmask = rgb[:m], mask[:m]
+        sl = slice(lo, lo + m)
+        face[...] = dark[sl, None, None, :]
+        for kind in range(6):
+            sel = np.flatnonzero(pattern[sl] == kind)
+            if len(sel):
+                p = lo + sel
+                fmask[sel] = _pattern_mask(kind, u, v, r, theta, freq[p, None, None],
+                                           angle[p, None, None], phase[p, None, None])
+        np.copyto(face, light[sl, None, None, :], where=fmask[..., None])
+        # Dark outline around the glyph so it reads on any pattern, then the glyph
+        for pad, color in ((0.08, None), (0.0, ink[sl, None, None, :])):
+            for kind in range(6):
+                sel = np.flatnonzero(glyph[sl] == kind)
+                if len(sel):
+                    fmask[sel] = _glyph_mask(kind, u, v, r, gsize[lo + sel, None, None], pad)
+            np.copyto(face, 16 if color is None else color, where=fmask[..., None])
+        for i in range(m):
+            out.append(pygame.surfarray.make_surface(face[i]))
+    return out
+
+class FaceStore:
+    """Faces loaded on demand, downsampled and evicted LRU under a byte budget.
+
+    Procedural faces are generated at the requested card size and cached
+    per (id, size); they are evictable like files since they can be rebuilt.
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget = budget_bytes
+        self.ids = []          # all known file/placeholder face IDs, in library order
+        self._sources = {}     # id -> file path, or a Surface that can't be reloaded
+        self._resident = OrderedDict()  # key -> surface, least recently used first
+        self._fixed = set()    # keys that can't be rebuilt, never evicted
+        self._pins = {}        # key -> number of live boards using the face
+        self.max_size = None   # (w, h) to downsample to, set lazily
+        self.bytes = 0
+        self.peak_bytes = 0
+        self.loads = self.hits = self.evictions = self.generated = 0
+        self._lock = threading.RLock()  # the next level may load on a worker
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add_file(self, fid, path):
+        self.ids.append(fid)
+        self._sources[fid] = path
+
+    def add_surface(self, fid, surf):
+        self.ids.append(fid)
+        self._sources[fid] = surf
+        self._fixed.add(fid)
+        self._store(fid, surf)
+
+    def population(self, pairs):
+        """Face IDs a level with `pairs` pairs samples from."""
+        if pairs <= len(self.ids) or np is None:
+            return list(self.ids)
+        return self.ids + [f"{PROC_PREFIX}{i}" for i in range(pairs)]
+
+    def has(self, fid):
+        if is_procedural(fid):
+            return np is not None and fid[len(PROC_PREFIX):].isdigit()
+        return fid in self._sources
+
+    def get(self, fid, size=None):
+        return self.use_batch([fid], size)[0]
+
+    def use(self, fids, size=None, cancel=None):
+        """Pin the faces of a board and return them loaded; pair with release().
+
+        Returns None, with nothing left pinned, if `cancel` is set meanwhile.
+        """
+        with self._lock:
+            for fid in fids:
+                key = self._key(fid, size)
+                self._pins[key] = self._pins.get(key, 0) + 1
+        surfs = self.use_batch(fids, size, cancel)
+        if surfs is None:
+            self.release(fids, size)
+            return None
+        return list(zip(fids, surfs))
+
+    def release(self, fids, size=None):
+        """Unpin faces of a board that is no longer played or prefetched."""
+        with self._lock:
+            for fid in fids:
+                key = self._key(fid, size)
+                left = self._pins.get(key, 0) - 1
+                if left > 0:
+                    self._pins[key] = left
+                else:
+                    self._pins.pop(key, None)
+            self._evict()
+
+    def use_batch(self, fids, size=None, cancel=None):
+        size = size or self._max_size()
+        found, missing = {}, {}
+        with self._lock:
+            for fid in fids:
+                key = self._key(fid, size)
+                surf = self._resident.get(key)
+                if surf is not None:
+                    self._resident.move_to_end(key)
+                    self.hits += 1
+                    found[key] = surf
+                else:
+                    missing[key] = fid
+
+        # Decode and generate outside the lock so the other thread isn't stalled
+        fresh = {}
+        procedural = [key for key, fid in missing.items() if is_procedural(fid)]
+        if procedural:
+            surfs = generate_faces([int(missing[key][len(PROC_PREFIX):]) for key in procedural], size, cancel=cancel)
+            if surfs is None:
+                return None
+            fresh.update(zip(procedural, surfs))
+        for key, fid in missing.items():
+            if key in fresh:
+                continue
+            if cancel is not None and cancel.is_set():
+                return None
+            fresh[key] = self.downsample(load_image(self._sources[fid]))
+
+        with self._lock:
+            for key, surf in fresh.items():
+                if key in self._resident:
+                    # The other thread loaded it meanwhile; keep one copy
+                    fresh[key] = self._resident[key]
+                    continue
+                if isinstance(key, tuple):
+                    self.generated += 1
+                else:
+                    self.loads += 1
+                self._store(key, surf)
+            self._evict()
+        found.update(fresh)
+        return [found[self._key(fid, size)] for fid in fids]
+
+    def stats(self):
+        return {
+            "faces": len(self.ids),
+            "resident": len(self._resident),
+            "bytes": self.bytes,
+            "peak_bytes": self.peak_bytes,
+            "budget": self.budget,
+            "loads": self.loads,
+            "generated": self.generated,
+            "hits": self.hits,
+            "evictions": self.evictions,
+        }
+
+    def _key(self, fid, size):
+        return (fid, size or self._max_size()) if is_procedural(fid) else fid
+
+    def _max_size(self):
+        if self.max_size is None:
+            # Largest card is the one on the smallest board (1 pair)
+            self.max_size = compute_card_size(*compute_grid(2))
+        return self.max_size
+
+    def downsample(self, surf):
+        w, h = surf.get_size()
+        mw, mh = self._max_size()
+        if w <= mw and h <= mh:
+            return surf
+        return pygame.transform.smoothscale(surf, (min(w, mw), min(h, mh)))
+
+    def _store(self, key, surf):
+        self._resident[key] = surf
+        self.bytes += surf.get_pitch() * surf.get_height()
+        self.peak_bytes = max(self.peak_bytes, self.bytes)
+
+    def _evict(self):
+        if self.bytes <= self.budget:
+            return
+        for key in list(self._resident):
+            if self.bytes <= self.budget:
+                break
+            if key in self._pins or key in self._fixed:
+                continue
+            surf = self._resident.pop(key)
+            self.bytes -= surf.get_pitch() * surf.get_height()
+            self.evictions += 1
+
 # Expect images/1.png .. images/32.png (or more). You can add any number.
-FACE_LIBRARY = []  # list of (id, surface)
+FACE_LIBRARY = FaceStore(FACE_BUDGET_BYTES)
 for fname in sorted(os.listdir(IMG_FOLDER)) if os.path.exists(IMG_FOLDER) else []:
     low = fname.lower()
     if low.endswith((".png", ".jpg", ".jpeg")):
-        FACE_LIBRARY.append((fname, load_image(os.path.join(IMG_FOLDER, fname))))
+        FACE_LIBRARY.add_file(fname, os.path.join(IMG_FOLDER, fname))
 
-if not FACE_LIBRARY:
+if not FACE_LIBRARY and np is None:
     # Fallback to generated placeholders so the game still runs
     for i in range(1, 33):
         surf = pygame.Surface((100, 140), pygame.SRCALPHA)
         surf.fill(((i*37)%255, (i*73)%255, (i*19)%255, 255))
-        FACE_LIBRARY.append((f"{i}.png", surf))
+        FACE_LIBRARY.add_surface(f"{i}.png", surf)
 
-# card back
-BACK_IMAGE = load_image(os.path.join(IMG_FOLDER, "back.png")) if os.path.exists(os.path.join(IMG_FOLDER, "back.png")) else load_image("")
+def report_face_stats():
+    print("[info] face store", FACE_LIBRARY.stats())
+
+# Every screen exits through sys.exit, so report from there
+atexit.register(report_face_stats)
 
 # =============================
 # UI helpers
@@ -186,46 +490,92 @@ def button(rect, label, hover, font=FONT_MD):
     draw_text_center(label, font, (10, 14, 18), rect.center)
 
 # =============================
-# Card object with flip anim
+# Card store with flip anim
 # =============================
-class Card:
-    def __init__(self, rect, face_idx, face_id, face_img, back_img):
-        self.rect = rect
-        self.face_idx = face_idx   # index inside selected set (0..pairs-1)
-        self.face_id = face_id     # global ID (filename)
-        self.face_img = face_img
+# Animation speeds in units per second (0.18 / 0.12 per frame at 60 FPS)
+FLIP_RATE = 0.18 * 60
+BUMP_RATE = 0.12 * 60
+MAX_ANIM_DT = 0.05  # clamp long frames (e.g. the pair-resolution delay)
+
+class CardStore:
+    """All cards of a board as parallel columns, addressed by index."""
+    __slots__ = ("w", "h", "x", "y", "face_idx", "flipped", "matched",
+                 "anim", "bump", "faces", "back_img", "_active")
+
+    def __init__(self, xs, ys, deck, faces, back_img, size):
+        self.w, self.h = size
+        self.x = array("i", xs)
+        self.y = array("i", ys)
+        self.face_idx = array("i", deck)   # index inside selected set (0..pairs-1)
+        n = len(self.face_idx)
+        self.flipped = bytearray(n)
+        self.matched = bytearray(n)
+        self.anim = array("f", [1.0]) * n
+        self.bump = array("f", [0.0]) * n
+        self.faces = faces                 # list of (id, surface) per face_idx
         self.back_img = back_img
-        self.flipped = False
-        self.matched = False
-        self.anim = 1.0
-        self.bump = 0.0  # small bounce on click
+        self._active = set()               # indices with a running animation
+
+    def __len__(self):
+        return len(self.face_idx)
+
+    def face_id(self, i):
+        return self.faces[self.face_idx[i]][0]
+
+    def rect(self, i):
+        return pygame.Rect(self.x[i], self.y[i], self.w, self.h)
+
+    def hit(self, pos):
+        mx, my = pos
+        w, h, xs, ys = self.w, self.h, self.x, self.y
+        for i in range(len(xs)):
+            if xs[i] <= mx < xs[i] + w and ys[i] <= my < ys[i] + h:
+                return i
+        return -1
+
+    def set_all_flipped(self, on):
+        self.flipped[:] = (b"\x01" if on else b"\x00") * len(self.flipped)
+
+    def flip_visual(self, i):
+        self.flipped[i] ^= 1
+        self.anim[i] = 0.0
+        self.bump[i] = 1.0
+        self._active.add(i)
+
+    def update(self, dt):
+        # Single pass over animating cards only; dt in seconds
+        if not self._active:
+            return
+        dt = min(dt, MAX_ANIM_DT)
+        da, db = FLIP_RATE * dt, BUMP_RATE * dt
+        anim, bump = self.anim, self.bump
+        done = []
+        for i in self._active:
+            anim[i] = min(1.0, anim[i] + da)
+            bump[i] = max(0.0, bump[i] - db)
+            if anim[i] >= 1.0 and bump[i] <= 0.0:
+                done.append(i)
+        self._active.difference_update(done)
 
     def draw(self, surf):
-        img = self.face_img if (self.flipped or self.matched) else self.back_img
-        scale_x = abs(self.anim - 0.5) * 2
-        w = max(1, int(self.rect.width * scale_x))
-        temp = pygame.transform.smoothscale(img, (w, self.rect.height))
-        temp_rect = temp.get_rect(center=self.rect.center)
-        # bump scale
-        if self.bump > 0:
-            bump_scale = 1.0 + 0.06 * self.bump
-            temp = pygame.transform.smoothscale(temp, (int(temp_rect.width * bump_scale), int(temp_rect.height * bump_scale)))
-            temp_rect = temp.get_rect(center=self.rect.center)
-        surf.blit(temp, temp_rect)
-        pygame.draw.rect(surf, (0,0,0), self.rect, 2, border_radius=10)
-
-    def update(self):
-        if self.anim < 1.0:
-            self.anim += 0.18
-            if self.anim > 1.0: self.anim = 1.0
-        if self.bump > 0:
-            self.bump -= 0.12
-            if self.bump < 0: self.bump = 0
-
-    def flip_visual(self):
-        self.flipped = not self.flipped
-        self.anim = 0.0
-        self.bump = 1.0
+        w, h = self.w, self.h
+        for i in range(len(self.face_idx)):
+            show_face = self.flipped[i] or self.matched[i]
+            img = self.faces[self.face_idx[i]][1] if show_face else self.back_img
+            rect = pygame.Rect(self.x[i], self.y[i], w, h)
+            if i in self._active:
+                scale_x = abs(self.anim[i] - 0.5) * 2
+                temp = pygame.transform.smoothscale(img, (max(1, int(w * scale_x)), h))
+                temp_rect = temp.get_rect(center=rect.center)
+                # bump scale
+                if self.bump[i] > 0:
+                    bump_scale = 1.0 + 0.06 * self.bump[i]
+                    temp = pygame.transform.smoothscale(temp, (int(temp_rect.width * bump_scale), int(temp_rect.height * bump_scale)))
+                    temp_rect = temp.get_rect(center=rect.center)
+                surf.blit(temp, temp_rect)
+            else:
+                surf.blit(img, rect)
+            pygame.draw.rect(surf, (0,0,0), rect, 2, border_radius=10)
 
 # =============================
 # Layout helpers
@@ -249,19 +599,39 @@ def compute_card_size(cols, rows):
     card_h = max(CARD_MIN_H, min(CARD_MAX_H, card_h))
     return int(card_w), int(card_h)
 
-def get_scaled_images(card_w, card_h, back_raw, selected_faces):
-    back_img = pygame.transform.smoothscale(back_raw, (card_w, card_h))
-    faces = [(fid, pygame.transform.smoothscale(img, (card_w, card_h))) for fid, img in selected_faces]
+# card back, downsampled like the faces (needs compute_card_size)
+BACK_IMAGE = FACE_LIBRARY.downsample(load_image(os.path.join(IMG_FOLDER, "back.png")) if os.path.exists(os.path.join(IMG_FOLDER, "back.png")) else load_image(""))
+
+_scaled_backs = {}  # (back surface id, w, h) -> scaled back, shared by boards
+
+def get_scaled_images(card_w, card_h, back_raw, selected_faces, cancel=None):
+    key = (id(back_raw), card_w, card_h)
+    back_img = _scaled_backs.get(key)
+    if back_img is None:
+        back_img = _scaled_backs[key] = pygame.transform.smoothscale(back_raw, (card_w, card_h))
+    faces = []
+    for fid, img in selected_faces:
+        if cancel is not None and cancel.is_set():
+            return back_img, None
+        if img.get_size() != (card_w, card_h):
+            img = pygame.transform.smoothscale(img, (card_w, card_h))
+        faces.append((fid, img))
     return back_img, faces
 
-def layout_cards(pairs, rng):
+def layout_cards(pairs, rng, cancel=None):
     num_cards = pairs * 2
     cols, rows = compute_grid(num_cards)
     cw, ch = compute_card_size(cols, rows)
 
     # choose faces
-    selected = rng.sample(FACE_LIBRARY, pairs)
-    back_img, faces_scaled = get_scaled_images(cw, ch, BACK_IMAGE, selected)
+    fids = rng.sample(FACE_LIBRARY.population(pairs), pairs)
+    selected = FACE_LIBRARY.use(fids, (cw, ch), cancel)
+    if selected is None:
+        return None, (cols, rows)
+    back_img, faces_scaled = get_scaled_images(cw, ch, BACK_IMAGE, selected, cancel)
+    if faces_scaled is None:
+        FACE_LIBRARY.release(fids, (cw, ch))
+        return None, (cols, rows)
 
     deck = [i for i in range(pairs) for _ in (0,1)]
     rng.shuffle(deck)
@@ -271,16 +641,68 @@ def layout_cards(pairs, rng):
     start_x = (WIDTH - board_w) // 2
     start_y = TOP_HUD + (HEIGHT - TOP_HUD - board_h) // 2
 
-    cards = []
-    for idx, face_idx in enumerate(deck):
+    xs, ys = [], []
+    for idx in range(len(deck)):
         r, c = divmod(idx, cols)
-        x = start_x + c * (cw + CELL_MARGIN)
-        y = start_y + r * (ch + CELL_MARGIN)
-        rect = pygame.Rect(x, y, cw, ch)
-        face_id, face_img = faces_scaled[face_idx]
-        cards.append(Card(rect, face_idx, face_id, face_img, back_img))
+        xs.append(start_x + c * (cw + CELL_MARGIN))
+        ys.append(start_y + r * (ch + CELL_MARGIN))
+    cards = CardStore(xs, ys, deck, faces_scaled, back_img, (cw, ch))
     return cards, (cols, rows)
 
+def release_board(cards):
+    # Drop this board's pins in the face store
+    FACE_LIBRARY.release([fid for fid, _ in cards.faces], (cards.w, cards.h))
+
+def make_rng(mode):
+    # RNG: normal vs daily seeded
+    if mode == "daily":
+        seed = datetime.date.today().isoformat()
+        return random.Random(seed)
+    return random.Random()
+
+class LevelPrefetch:
+    """Builds a level's board on a worker thread while another is played."""
+
+    def __init__(self, level, mode):
+        self.level = level
+        self.mode = mode
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()  # hands the board over to cancel() or take()
+        self._result = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        rng = make_rng(self.mode)
+        try:
+            cards, grid = layout_cards(self.level, rng, self._cancel)
+        except Exception as e:
+            self._error = e
+            return
+        if cards is None:
+            return
+        with self._lock:
+            if self._cancel.is_set():
+                release_board(cards)
+            else:
+                self._result = (rng, cards, grid)
+
+    def cancel(self):
+        # Doesn't wait: a build still running releases its own board
+        with self._lock:
+            self._cancel.set()
+            if self._result is not None:
+                release_board(self._result[1])
+                self._result = None
+
+    def take(self):
+        # Waits for the build if the player got here first
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
 # =============================
 # Screens
 # =============================
@@ -345,43 +767,161 @@ def save_daily_scores():
 
 def apply_shuffle(cards, rng):
     # Shuffle only unmatched cards' positions
-    free = [c for c in cards if not c.matched]
-    poses = [c.rect.topleft for c in free]
+    free = [i for i in range(len(cards)) if not cards.matched[i]]
+    poses = [(cards.x[i], cards.y[i]) for i in free]
     rng.shuffle(poses)
-    for c, pos in zip(free, poses):
-        c.rect.topleft = pos
+    for i, (x, y) in zip(free, poses):
+        cards.x[i] = x
+        cards.y[i] = y
 
 
 def apply_bomb(cards, rng, pairs_to_clear=1):
     # Clear random unmatched pair(s)
     remaining = {}
-    for c in cards:
-        if not c.matched:
-            remaining.setdefault(c.face_idx, []).append(c)
+    for i in range(len(cards)):
+        if not cards.matched[i]:
+            remaining.setdefault(cards.face_idx[i], []).append(i)
     keys = [k for k, v in remaining.items() if len(v)>=2]
     rng.shuffle(keys)
     cleared = 0
     for k in keys:
         a, b = remaining[k][:2]
-        a.matched = b.matched = True
+        cards.matched[a] = cards.matched[b] = 1
         cleared += 1
         if cleared >= pairs_to_clear:
             break
     return cleared
 
+# -----------------------------
+# Suspend/resume snapshots
+# -----------------------------
+# Layout: magic, static part (mode, level, card size, face IDs, deck) packed
+# once per level, then the dynamic part (counters, positions, flags, RNG)
+# repacked after every move. Arrays are stored in native byte order.
+SNAP_MAGIC = b"MMS2"
+SNAP_MODES = ("single", "multi", "daily", "training")
+_SNAP_HEAD = struct.Struct("<4sBHIHHII")  # magic, mode, level, daily date ordinal (0 = none), w, h, cards, ids bytes
+_SNAP_STATE = struct.Struct("<IIIIIBdIB") # moves, mismatches, matches, p1, p2, turn, played, freeze ms, has gauss
+_SNAP_RNG = struct.Struct("<Id")          # rng version, gauss value
+
+class GameSnapshot:
+    """Compact binary snapshot of one running level."""
+
+    def __init__(self, level, mode, cards, day=None):
+        ids = "\0".join(fid for fid, _ in cards.faces).encode("utf-8")
+        day = day.toordinal() if day else 0
+        self._static = (
+            _SNAP_HEAD.pack(SNAP_MAGIC, SNAP_MODES.index(mode), level, day, cards.w, cards.h, len(cards), len(ids))
+            + ids + cards.face_idx.tobytes()
+        )
+
+    def save(self, cards, rng, moves, mismatches, matches, p_scores, cur_player, played, freeze_left_ms,
+             revealing=False):
+        version, internal, gauss = rng.getstate()
+        # The training reveal is not game state; store the board face-down
+        flipped = bytes(len(cards)) if revealing else bytes(cards.flipped)
+        parts = [
+            self._static,
+            _SNAP_STATE.pack(moves, mismatches, matches, p_scores[0], p_scores[1], cur_player,
+                             played, int(freeze_left_ms), gauss is not None),
+            cards.x.tobytes(), cards.y.tobytes(), flipped, bytes(cards.matched),
+            _SNAP_RNG.pack(version, gauss or 0.0), array("I", internal).tobytes(),
+        ]
+        tmp = SNAPSHOT_FILE + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(b"".join(parts))
+            os.replace(tmp, SNAPSHOT_FILE)
+        except Exception as e:
+            print("[warn] save_snapshot", e)
+
+
+def load_snapshot():
+    """Rebuild a suspended level from SNAPSHOT_FILE, or None if there is none."""
+    if not os.path.exists(SNAPSHOT_FILE):
+        return None
+    faces = None
+    try:
+        with open(SNAPSHOT_FILE, "rb") as f:
+            data = f.read()
+        magic, mode, level, day, w, h, n, ids_len = _SNAP_HEAD.unpack_from(data, 0)
+        if magic != SNAP_MAGIC:
+            raise ValueError("bad magic")
+        if _snapshot_stale(mode, day):
+            raise ValueError("daily challenge from another day")
+        off = _SNAP_HEAD.size
+        ids = data[off:off+ids_len].decode("utf-8").split("\0"); off += ids_len
+        deck = array("i"); deck.frombytes(data[off:off+4*n]); off += 4*n
+        (moves, mismatches, matches, p1, p2, cur_player,
+         played, freeze_left_ms, has_gauss) = _SNAP_STATE.unpack_from(data, off); off += _SNAP_STATE.size
+        xs = array("i"); xs.frombytes(data[off:off+4*n]); off += 4*n
+        ys = array("i"); ys.frombytes(data[off:off+4*n]); off += 4*n
+        flipped = bytearray(data[off:off+n]); off += n
+        matched = bytearray(data[off:off+n]); off += n
+        version, gauss = _SNAP_RNG.unpack_from(data, off); off += _SNAP_RNG.size
+        internal = array("I"); internal.frombytes(data[off:])
+        rng = random.Random()
+        rng.setstate((version, tuple(internal), gauss if has_gauss else None))
+        missing = [fid for fid in ids if not FACE_LIBRARY.has(fid)]
+        if missing:
+            raise KeyError(f"faces no longer available: {missing[:3]}")
+
+        # Pin only once the snapshot is known to be good
+        faces = FACE_LIBRARY.use(ids, (w, h))
+        back_img, scaled = get_scaled_images(w, h, BACK_IMAGE, faces)
+        cards = CardStore(xs, ys, deck, scaled, back_img, (w, h))
+        cards.flipped[:] = flipped
+        cards.matched[:] = matched
+    except Exception as e:
+        print("[warn] load_snapshot", e)
+        if faces is not None:
+            FACE_LIBRARY.release(ids, (w, h))
+        clear_snapshot()
+        return None
+    return {
+        "level": level, "mode": SNAP_MODES[mode], "cards": cards, "rng": rng,
+        "moves": moves, "mismatches": mismatches, "matches": matches,
+        "p_scores": [p1, p2], "cur_player": cur_player,
+        "played": played, "freeze_left_ms": freeze_left_ms,
+    }
+
+
+def _snapshot_stale(mode, day):
+    # A daily board only counts on the day it was dealt
+    return SNAP_MODES[mode] == "daily" and day != datetime.date.today().toordinal()
+
+
+def peek_snapshot():
+    """(mode, level) of the suspended level without loading it, or None."""
+    try:
+        with open(SNAPSHOT_FILE, "rb") as f:
+            magic, mode, level, day = _SNAP_HEAD.unpack(f.read(_SNAP_HEAD.size))[:4]
+        if magic == SNAP_MAGIC and not _snapshot_stale(mode, day):
+            return SNAP_MODES[mode], level
+    except Exception:
+        pass
+    return None
+
+
+def clear_snapshot():
+    try:
+        if os.path.exists(SNAPSHOT_FILE):
+            os.remove(SNAPSHOT_FILE)
+    except Exception as e:
+        print("[warn] clear_snapshot", e)
+
 # -----------------------------
 # Game screens
 # -----------------------------
 
-def game_screen(level=1, mode="single"):
-    # RNG: normal vs daily seeded
-    if mode == "daily":
-        seed = datetime.date.today().isoformat()
-        rng = random.Random(seed)
+def game_screen(level=1, mode="single", prefetched=None, resume=None, on_board=None):
+    if resume is not None:
+        rng, cards = resume["rng"], resume["cards"]
+    elif prefetched is not None:
+        rng, cards, (cols, rows) = prefetched.take()
     else:
-        rng = random.Random()
-
-    cards, (cols, rows) = layout_cards(level, rng)
+        rng = make_rng(mode)
+        cards, (cols, rows) = layout_cards(level, rng)
     flipped = []
     matches = 0
     total_pairs = level
@@ -398,11 +938,35 @@ def game_screen(level=1, mode="single"):
 
     # Training: reveal at start for 4s
     training_reveal_ms = 0
-    if mode == "training":
-        for c in cards:
-            c.flipped = True
+    if resume is not None:
+        moves, mismatches, matches = resume["moves"], resume["mismatches"], resume["matches"]
+        p_scores, cur_player = resume["p_scores"], resume["cur_player"]
+        start_ts -= resume["played"]
+        freeze_left_ms = resume["freeze_left_ms"]
+        # Only a lone face-up card is a pending pick; anything else is stale
+        face_up = [i for i in range(len(cards)) if cards.flipped[i] and not cards.matched[i]]
+        if len(face_up) == 1:
+            flipped = face_up
+        else:
+            for i in face_up:
+                cards.flipped[i] = 0
+    elif mode == "training":
+        cards.set_all_flipped(True)
         training_reveal_ms = 4000
 
+    # Daily results go to the day the board was dealt, even past midnight
+    day = datetime.date.today() if mode == "daily" else None
+    snapshot = GameSnapshot(level, mode, cards, day)
+    def save_snapshot():
+        played = max(0.0, (time.time() - start_ts) - frozen_accum)
+        snapshot.save(cards, rng, moves, mismatches, matches, p_scores, cur_player, played, freeze_left_ms,
+                      revealing=training_reveal_ms > 0)
+    if resume is None:
+        save_snapshot()
+    _journal.log("level_start", mode=mode, level=level, pairs=total_pairs, resumed=resume is not None)
+    if on_board:
+        on_board()
+
     running = True
     while running:
         dt = clock.tick(FPS)
@@ -419,6 +983,7 @@ def game_screen(level=1, mode="single"):
             if e.type == pygame.QUIT:
                 pygame.quit(); sys.exit()
             if e.type == pygame.KEYDOWN and e.key == pygame.K_ESCAPE:
+                release_board(cards)
                 return False
             if e.type == pygame.MOUSEBUTTONDOWN and e.button == 1:
                 click = True
@@ -427,18 +992,18 @@ def game_screen(level=1, mode="single"):
         if training_reveal_ms > 0:
             training_reveal_ms -= dt
             if training_reveal_ms <= 0:
-                for c in cards:
-                    c.flipped = False
+                cards.set_all_flipped(False)
+                save_snapshot()
 
         # Card clicks
         if click and training_reveal_ms <= 0:
-            for card in cards:
-                if card.rect.collidepoint((mx, my)) and not card.flipped and not card.matched:
-                    if len(flipped) < 2:
-                        snd_flip.play() if _profile["settings"].get("sfx", True) else None
-                        card.flip_visual()
-                        flipped.append(card)
-                    break
+            i = cards.hit((mx, my))
+            if i >= 0 and not cards.flipped[i] and not cards.matched[i]:
+                if len(flipped) < 2:
+                    snd_flip.play() if _profile["settings"].get("sfx", True) else None
+                    cards.flip_visual(i)
+                    flipped.append(i)
+                    _journal.log("flip", card=i)
 
         # Power-up clicks (single/daily/training only)
         pu_hud = None
@@ -459,23 +1024,27 @@ def game_screen(level=1, mode="single"):
             pygame.time.delay(380)
             moves += 1
             a, b = flipped
-            if a.face_idx == b.face_idx:
+            if cards.face_idx[a] == cards.face_idx[b]:
                 snd_match.play() if _profile["settings"].get("sfx", True) else None
-                a.matched = b.matched = True
+                cards.matched[a] = cards.matched[b] = 1
                 matches += 1
                 if mode == "multi":
                     p_scores[cur_player-1] += 1
+                _journal.log("match", face=cards.face_id(a), moves=moves)
                 # Add to collection
-                if a.face_id not in _profile["collection"]:
-                    _profile["collection"].append(a.face_id)
+                face_id = cards.face_id(a)
+                if face_id not in _profile["collection"]:
+                    _profile["collection"].append(face_id)
                     save_profile()
             else:
                 snd_mismatch.play() if _profile["settings"].get("sfx", True) else None
                 mismatches += 1
-                a.flip_visual(); b.flip_visual()
+                cards.flip_visual(a); cards.flip_visual(b)
+                _journal.log("mismatch", moves=moves)
                 if mode == "multi":
                     cur_player = 2 if cur_player == 1 else 1
             flipped.clear()
+            save_snapshot()
 
         # Drawing
         screen.fill(BG_COLOR)
@@ -490,14 +1059,14 @@ def game_screen(level=1, mode="single"):
             if mode == "single":
                 best = _scores.get(str(level))
             elif mode == "daily":
-                dkey = datetime.date.today().isoformat()
+                dkey = day.isoformat()
                 best = _daily_scores.get(dkey, {}).get("best_time")
                 label_mode = f"daily {dkey}"
             draw_hud_single(level, moves, elapsed, best, powerups=pu_hud, mode=label_mode, extra="Esc-Home"   "                  "  "Click power-ups on right")
 
         # Draw cards
-        for c in cards:
-            c.update(); c.draw(screen)
+        cards.update(dt/1000.0)
+        cards.draw(screen)
 
         # Now that HUD is drawn, handle power-up clicks if any
         if pu_hud and click:
@@ -506,24 +1075,32 @@ def game_screen(level=1, mode="single"):
             if r and r.collidepoint((mx,my)) and _profile["powerups"].get("shuffle",0) > 0:
                 apply_shuffle(cards, rng)
                 _profile["powerups"]["shuffle"] -= 1
+                _journal.log("powerup", kind="shuffle")
                 save_profile()
+                save_snapshot()
             r = pu_hud.get("_bomb_rect")
             if r and r.collidepoint((mx,my)) and _profile["powerups"].get("bomb",0) > 0:
                 cleared = apply_bomb(cards, rng, 1)
                 if cleared>0:
                     matches += cleared
                     _profile["powerups"]["bomb"] -= 1
+                    _journal.log("powerup", kind="bomb", cleared=cleared)
                     save_profile()
+                    save_snapshot()
             r = pu_hud.get("_freeze_rect")
             if r and r.collidepoint((mx,my)) and _profile["powerups"].get("freeze",0) > 0:
                 freeze_left_ms = max(freeze_left_ms, 10000)
                 _profile["powerups"]["freeze"] -= 1
+                _journal.log("powerup", kind="freeze")
                 save_profile()
+                save_snapshot()
 
         # Win condition
         if matches >= total_pairs:
+            clear_snapshot()
             snd_win.play() if _profile["settings"].get("sfx", True) else None
             elapsed = int(max(0, (time.time() - start_ts) - frozen_accum))
+            _journal.log("win", mode=mode, level=level, time=elapsed, moves=moves, mismatches=mismatches)
 
             # Stats/achievements (single only affects level scores & streak)
             if mode == "single":
@@ -541,12 +1118,13 @@ def game_screen(level=1, mode="single"):
                     _profile["achievements"]["flawless"] = True
                 if elapsed <= 20:
                     _profile["achievements"]["speed_runner"] = True
-                if len(_profile["collection"]) >= min(32, len(FACE_LIBRARY)):
+                # Levels 1..32 draw from population(32), procedural faces included
+                if len(_profile["collection"]) >= min(32, len(FACE_LIBRARY.population(32))):
                     _profile["achievements"]["collector"] = True
                 save_profile()
 
             elif mode == "daily":
-                dkey = datetime.date.today().isoformat()
+                dkey = day.isoformat()
                 entry = _daily_scores.get(dkey, {"best_time": None, "best_moves": None})
                 if entry["best_time"] is None or elapsed < entry["best_time"]:
                     entry["best_time"] = elapsed
@@ -571,6 +1149,7 @@ def game_screen(level=1, mode="single"):
                 draw_text_center(f"Time {elapsed}s • Moves {moves}", FONT_MD, WHITE, (WIDTH//2, HEIGHT//2 + 20))
             pygame.display.flip()
             pygame.time.delay(2200)
+            release_board(cards)
             return True
 
         pygame.display.flip()
@@ -601,6 +1180,12 @@ def scores_screen():
             best = _scores.get(str(level))
             val = f"{best}s" if best is not None else "—"
             draw_text_left(val, FONT_SM, ACCENT if best is not None else MUTED, (x+140, y))
+            avg = _journal.stats.avg_time("single", level)
+            if avg is not None:
+                draw_text_left(f"avg {avg:.0f}s", FONT_XS, MUTED, (x+200, y+4))
+        acc = _journal.stats.accuracy()
+        if acc is not None:
+            draw_text_center(f"Match accuracy {acc*100:.0f}%", FONT_SM, MUTED, (WIDTH//2, HEIGHT-BOARD_PAD-24))
 
         h = btn_back
         button(h, "Back", h.collidepoint((mx,my)))
@@ -676,7 +1261,10 @@ def collection_screen():
     collected = _profile.get("collection", [])
     thumbs = []
     for fid in collected:
-        img = load_image(os.path.join(IMG_FOLDER, fid))
+        if is_procedural(fid):
+            img = FACE_LIBRARY.get(fid, (90, 126))
+        else:
+            img = load_image(os.path.join(IMG_FOLDER, fid))
         thumbs.append((fid, pygame.transform.smoothscale(img, (90, 126))))
     back = pygame.Rect(BOARD_PAD, HEIGHT-BOARD_PAD-56, 180, 48)
 
@@ -711,7 +1299,11 @@ def collection_screen():
 # -----------------------------
 
 def home_screen():
-    labels = [
+    labels = []
+    suspended = peek_snapshot()
+    if suspended:
+        labels.append((f"Resume {suspended[0].title()} L{suspended[1]}", "resume"))
+    labels += [
         ("Single Player", "single"),
         ("Multiplayer", "multi"),
         ("Daily Challenge", "daily"),
@@ -720,7 +1312,8 @@ def home_screen():
         ("Settings", "settings"),
         ("Quit", "quit"),
     ]
-    rects = [pygame.Rect(WIDTH//2-170, 190+i*56, 340, 46) for i in range(len(labels))]
+    step = 56 if len(labels) <= 7 else 50
+    rects = [pygame.Rect(WIDTH//2-170, 190+i*step, 340, 46) for i in range(len(labels))]
 
     while True:
         mx, my = pygame.mouse.get_pos(); click=False
@@ -751,12 +1344,43 @@ def home_screen():
 # Main loop
 # -----------------------------
 
-def main():
+def play_levels(action, start=1, resume=None):
     level_cap = 32
+    # Loop through levels 1..32 for single/multi; for daily/training we just play level 8 default
+    if action in ("single", "multi"):
+        current = None
+        for lv in range(start, level_cap+1):
+            # Build the next board while this one is played, once it is on screen
+            started = []
+            def prefetch_next():
+                if lv < level_cap:
+                    started.append(LevelPrefetch(lv+1, action))
+            cont = game_screen(level=lv, mode=action, prefetched=current, resume=resume, on_board=prefetch_next)
+            resume = None
+            current = started[0] if started else None
+            if not cont:
+                # Esc suspends the level; the board is kept in the snapshot
+                if current: current.cancel()
+                break
+    else:
+        # preset level size (pairs)
+        cont = game_screen(level=start if resume else 8, mode=action, resume=resume)
+        # no streak updates for these modes
+
+
+def main():
+    # Pick up a level left by Esc, a quit or a crash
+    snap = load_snapshot()
+    if snap:
+        play_levels(snap["mode"], snap["level"], snap)
     while True:
         action = home_screen()
         if action == "quit":
             pygame.quit(); sys.exit()
+        elif action == "resume":
+            snap = load_snapshot()
+            if snap:
+                play_levels(snap["mode"], snap["level"], snap)
         elif action == "scores":
             scores_screen()
         elif action == "settings":
@@ -764,19 +1388,13 @@ def main():
         elif action == "collection":
             collection_screen()
         elif action in ("single", "multi", "daily", "training"):
-            # Loop through levels 1..32 for single/multi; for daily/training we just play level 8 default
-            if action in ("single", "multi"):
-                for lv in range(1, level_cap+1):
-                    cont = game_screen(level=lv, mode=action)
-                    if not cont:
-                        # reset streak if exited early in single
-                        if action == "single":
-                            _profile["streak"] = 0; save_profile()
-                        break
-            else:
-                # preset level size (pairs)
-                cont = game_screen(level=8, mode=action)
-                # no streak updates for these modes
+            # Starting over abandons the suspended level; reset streak if it was single
+            suspended = peek_snapshot()
+            if suspended:
+                clear_snapshot()
+                if suspended[0] == "single":
+                    _profile["streak"] = 0; save_profile()
+            play_levels(action)
         else:
             pass
 